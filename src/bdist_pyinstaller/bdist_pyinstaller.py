@@ -25,9 +25,125 @@ from distutils.file_util import write_file
 from distutils import log
 from copy import copy
 import subprocess
-import importlib
+import json
+import gzip
 import tarfile
 
+from bdist_pyinstaller.harvest import scan_packages
+from bdist_pyinstaller.resources import write_archive
+
+HARVEST_MANIFEST_NAME = ".pyinstaller_harvest.json"
+RESOURCE_ARCHIVE_NAME = ".pyinstaller_resources.bin"
+RESOURCE_ARCHIVE_HOOK = ".pyinstaller_rthook_resources.py"
+NATIVE_FILE_REGEX = re.compile(r".*\.(so(\.[\d.]+)?|pyd|dll|dylib)$")
+
+# Note: the minimal timestamp which can be represented in a zip archive(1980-01-01)
+DEFAULT_SOURCE_DATE_EPOCH = 315532800
+
+# Note: the children started by multiprocessing(spawn, forkserver and the resource tracker)
+#   re-execute the binary. They are routed to multiprocessing before any of the entrypoints is
+#   imported and before the alias is resolved from the process name, pyinstaller's runtime hook
+#   makes freeze_support() handle them on all the platforms.
+MULTIPROCESSING_DISPATCHER = """
+import sys
+
+if sys.argv[1:2] == ["--multiprocessing-fork"] or any(
+        arg.startswith(("from multiprocessing.", "import sys; from multiprocessing."))
+        for arg in sys.argv[1:]):
+    import multiprocessing
+    multiprocessing.freeze_support()
+"""
+
+FORKSERVER_PRELOAD_DISPATCHER = """
+_CMD_MODULES_ = {}
+
+def preload_forkserver(process_name):
+    # The forkserver started by the command imports its modules once, so that the workers
+    #   forked from it start fast
+    if _CMD_MODULES_.get(process_name):
+        import multiprocessing
+        multiprocessing.set_forkserver_preload(_CMD_MODULES_[process_name])
+"""
+
+METRICS_FILE_ENV = "BDIST_PYINSTALLER_METRICS_FILE"
+METRICS_MAX_BYTES = 10 * 1024 * 1024
+
+# Note: the invocation metrics are appended with a single O_APPEND write, so concurrent invocations
+#   do not need any locking. The file is rotated by renaming it once it outgrows the limit, the
+#   writers still holding the old one simply complete their write into the rotated file.
+METRICS_DISPATCHER = r"""
+_METRICS_FILE_ = os.path.expandvars(os.path.expanduser(
+    os.environ.get("{metrics_file_env}", {metrics_file!r})))
+
+def record_metrics(exit_code):
+    try:
+        if not _METRICS_FILE_:
+            return
+        import resource
+        # Note: both are measured from the start of the dispatcher
+        wall_seconds = time.perf_counter() - _STARTED_[0]
+        cpu_seconds = time.process_time() - _STARTED_[1]
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            max_rss *= 1024
+        if exit_code is None:
+            exit_code = 0
+        elif not isinstance(exit_code, int):
+            exit_code = 1
+        alias = str(_INVOCATION_.get("alias")).replace("\\", "\\\\").replace('"', '\\"')
+        record = ('{{"ts": %.6f, "package": "{package_name}", "version": "{package_version}", '
+                  '"alias": "%s", "exit_code": %d, "pid": %d, "wall_seconds": %.6f, '
+                  '"cpu_seconds": %.6f, "max_rss_bytes": %d}}\n') % (
+            time.time(), alias, exit_code, os.getpid(), wall_seconds, cpu_seconds, max_rss)
+        fd = os.open(_METRICS_FILE_, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, record.encode())
+            stat = os.fstat(fd)
+            if (stat.st_size > {metrics_max_bytes}
+                    and os.stat(_METRICS_FILE_).st_ino == stat.st_ino):
+                os.replace(_METRICS_FILE_, _METRICS_FILE_ + ".1")
+        finally:
+            os.close(fd)
+    except Exception:
+        # Note: the metrics must never affect the command itself
+        pass
+"""
+
+# interactive shell backend -> (packages to install, packages to harvest,
+#   top-level modules the analyzer attributes to the backend, dispatcher block)
+SHELL_BACKENDS = {
+    "ipython": (
+        ("ipython",),
+        ("parso",),  # Note: It is required for IPython
+        ("IPython", "jedi", "parso"),
+        """
+def itoolkit():
+    from IPython import start_ipython
+    sys.exit(start_ipython())
+""",
+    ),
+    "console": (
+        (),
+        (),
+        (),
+        """
+def itoolkit():
+    import code
+    namespace = {"__name__": "__console__", "__doc__": None}
+    try:
+        import readline
+        import rlcompleter
+        readline.set_completer(rlcompleter.Completer(namespace).complete)
+        readline.parse_and_bind("tab: complete")
+    except ImportError:
+        pass
+    code.InteractiveConsole(namespace).interact()
+    sys.exit(0)
+""",
+    ),
+    "none": ((), (), (), None),
+}
+
 
 def get_pip_index_url():
     """
@@ -94,17 +210,76 @@ class PyInstalerCmd(Command):
             "modules to be explicitly bundled-in",
             "(default: None)",
         ),
+        (
+            "harvest-jobs=",
+            "j",
+            "number of worker processes scanning the packages to harvest",
+            "(default: number of CPUs)",
+        ),
+        (
+            "shell=",
+            None,
+            "backend of the interactive <name>-python shell: {}".format(
+                ", ".join(sorted(SHELL_BACKENDS))
+            ),
+            "(default: ipython)",
+        ),
+        (
+            "data-archive",
+            None,
+            "pack the harvested data files into a single memory-mapped archive",
+            "(default: false)",
+        ),
+        (
+            "metrics-file=",
+            None,
+            "file the dispatcher appends the invocation metrics to(JSON lines)",
+            "(default: None)",
+        ),
+        (
+            "metrics-max-bytes=",
+            None,
+            "size at which the metrics file is rotated",
+            "(default: 10485760)",
+        ),
+        (
+            "reproducible",
+            None,
+            "produce byte-identical artifacts from identical inputs(honours SOURCE_DATE_EPOCH)",
+            "(default: false)",
+        ),
+        (
+            "forkserver-preload",
+            None,
+            "preload the modules of the invoked command in the multiprocessing forkserver",
+            "(default: false)",
+        ),
         ("one-dir", None, "one directory mode", "(default: false)"),
         ("rpm", None, "create rpm deliverable", "(default: false)"),
         ("deb", None, "create deb deliverable", "(default: false)"),
     ]
-    boolean_options = ["one-dir", "rpm", "deb"]
+    boolean_options = [
+        "data-archive",
+        "reproducible",
+        "forkserver-preload",
+        "one-dir",
+        "rpm",
+        "deb",
+    ]
 
     def initialize_options(self):
         self.bdist_dir = None
         self.dist_dir = None
         self.extra_args = None
         self.extra_modules = None
+        self.harvest_jobs = None
+        self.shell = None
+        self.data_archive = False
+        self.metrics_file = None
+        self.metrics_max_bytes = None
+        self.reproducible = False
+        self.source_date_epoch = None
+        self.forkserver_preload = False
         self.one_dir = False
         self.rpm = False
         self.deb = False
@@ -119,12 +294,45 @@ class PyInstalerCmd(Command):
             bdist_base = self.get_finalized_command("bdist").bdist_base
             self.dist_dir = os.path.join(bdist_base, "bdist_pyinstaller")
 
+        if self.harvest_jobs is not None:
+            self.harvest_jobs = int(self.harvest_jobs)
+
+        if self.shell is None:
+            self.shell = "ipython"
+        if self.shell not in SHELL_BACKENDS:
+            raise DistutilsOptionError(
+                "Unsupported shell backend: {} (expected one of: {})".format(
+                    self.shell, ", ".join(sorted(SHELL_BACKENDS))
+                )
+            )
+
+        self.metrics_max_bytes = int(self.metrics_max_bytes or METRICS_MAX_BYTES)
+
+        if self.reproducible:
+            self.source_date_epoch = int(
+                os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_SOURCE_DATE_EPOCH)
+            )
+
     def run(self):
         if not self.distribution.packages:
             raise ValueError(
                 "The list of modules seems to be empty(no packages detected). Please verify your configuration!"
             )
 
+        shell_requirements, shell_packages, shell_modules, shell_dispatcher = SHELL_BACKENDS[
+            self.shell
+        ]
+
+        if self.reproducible:
+            # Note: pyinstaller, dpkg-deb and rpmbuild all pick the timestamp up from the
+            #   environment
+            os.environ["SOURCE_DATE_EPOCH"] = str(self.source_date_epoch)
+            if os.environ.get("PYTHONHASHSEED") in (None, "random"):
+                log.warn(
+                    "PYTHONHASHSEED is not set, pyinstaller may not produce identical outputs"
+                    " for identical inputs"
+                )
+
         index_url = get_pip_index_url()
         index_url_args = []
         if index_url:
@@ -140,9 +348,9 @@ class PyInstalerCmd(Command):
                         "install",
                         "pyinstaller",
                         "psutil",
-                        "ipython",
                         "tomli",
                     ),
+                    shell_requirements,
                     index_url_args,
                 )
             ),
@@ -213,12 +421,18 @@ class PyInstalerCmd(Command):
 #    limitations under the License.
 """
             )
+            pyinstaller_dispatcher_fl.write(MULTIPROCESSING_DISPATCHER)
+            if self.metrics_file:
+                # Note: the wall and CPU time are measured from the beginning of the dispatcher
+                pyinstaller_dispatcher_fl.write(
+                    "import time\n_STARTED_ = (time.perf_counter(), time.process_time())\n"
+                )
             # imports
             pyinstaller_dispatcher_fl.write(
                 "\n".join(
                     [
                         "from {} import {} as {}".format(p, f, fqn_name(p, f))
-                        for p, f in function_imports
+                        for p, f in sorted(function_imports)
                     ]
                 )
             )
@@ -266,12 +480,7 @@ def setup_aliases(main_binary, aliases):
     return 0
 
 _CMD_ALIASES_ = {{}}
-
-def itoolkit():
-    from IPython import start_ipython
-    sys.exit(start_ipython())
-
-_CMD_ALIASES_["{package_name}-python"] = lambda x: itoolkit()
+_INVOCATION_ = {{}}
 
 def main():
     # The entry point of the generated dispatch
@@ -281,6 +490,7 @@ def main():
         import psutil
         process_dict = psutil.Process(os.getpid()).as_dict()
         process_name = process_dict.get('name')
+        _INVOCATION_["alias"] = process_name
 
         import {sample_import_module}
         _sample_import_dir_ = os.path.realpath(os.path.dirname({sample_import_module}.__file__))
@@ -298,6 +508,8 @@ def main():
             else:
                 if process_name not in _CMD_ALIASES_ and os.environ.get('__process__'):
                     process_name = os.environ.get('__process__')
+                    _INVOCATION_["alias"] = process_name
+                {pre_dispatch}
                 return _CMD_ALIASES_.get(process_name, lambda x: 1)(process_name)
         except SystemExit:
             exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -317,12 +529,36 @@ def main():
             """.format(
                     package_name=self.distribution.get_name(),
                     sample_import_module=sample_import_module,
+                    pre_dispatch="preload_forkserver(process_name)"
+                    if self.forkserver_preload
+                    else "",
                 )
             )
-            self.aliases.append("{}-python".format(self.distribution.get_name()))
+            if self.forkserver_preload:
+                pyinstaller_dispatcher_fl.write(FORKSERVER_PRELOAD_DISPATCHER)
+            if shell_dispatcher:
+                pyinstaller_dispatcher_fl.write(shell_dispatcher)
+                pyinstaller_dispatcher_fl.write(
+                    """
+_CMD_ALIASES_["{package_name}-python"] = lambda x: itoolkit()
+
+""".format(
+                        package_name=self.distribution.get_name()
+                    )
+                )
+                self.aliases.append("{}-python".format(self.distribution.get_name()))
 
-            for script_name, package_name, function_name in console_scripts:
+            for script_name, package_name, function_name in sorted(console_scripts):
                 self.aliases.append(script_name)
+                if self.forkserver_preload:
+                    pyinstaller_dispatcher_fl.write(
+                        """
+_CMD_MODULES_["{script_name}"] = ["{package_name}"]
+""".format(
+                            script_name=script_name,
+                            package_name=package_name,
+                        )
+                    )
                 if function_name:
                     pyinstaller_dispatcher_fl.write(
                         """
@@ -350,91 +586,134 @@ _CMD_ALIASES_["{script_name}"] = lambda x: dispatch_{package_name}()
                         )
                     )
 
-            pyinstaller_dispatcher_fl.write(
-                """
+            if self.metrics_file:
+                pyinstaller_dispatcher_fl.write(
+                    METRICS_DISPATCHER.format(
+                        metrics_file_env=METRICS_FILE_ENV,
+                        metrics_file=self.metrics_file,
+                        metrics_max_bytes=self.metrics_max_bytes,
+                        package_name=self.distribution.get_name(),
+                        package_version=self.distribution.get_version(),
+                    )
+                )
+                pyinstaller_dispatcher_fl.write(
+                    """
+if __name__ == "__main__":
+    if PROFILE:
+        profile()
+    exit_code = main()
+    record_metrics(exit_code)
+    sys.exit(exit_code)  # pragma: no cover
+"""
+                )
+            else:
+                pyinstaller_dispatcher_fl.write(
+                    """
 if __name__ == "__main__":
     if PROFILE:
         profile()
     sys.exit(main())  # pragma: no cover
 """
-            )
+                )
 
         try:
             extra_binaries = set()
             extra_data = set()
             hidden_imports = set()
+            runtime_hooks = set()
 
-            packages_to_harvest = set(
-                [p.split(".", 1)[0] for p in self.distribution.packages]
-            )
-            packages_to_harvest.add("parso")  # Note: It is required for IPython
+            # Note: the origin of each harvested package is recorded in the bundle
+            #   so that bdist_pyinstaller_analyze can attribute the size to it
+            harvest_sources = {}
+            for p in self.distribution.packages:
+                harvest_sources.setdefault(p.split(".", 1)[0], "distribution.packages")
+            for p in shell_packages:
+                harvest_sources.setdefault(p, self.shell)
 
             if self.extra_modules:
-                packages_to_harvest.update(
-                    [
-                        extra_module.strip()
-                        for extra_module in self.extra_modules.split(",")
-                        if extra_module.strip()
-                    ]
-                )
+                for extra_module in self.extra_modules.split(","):
+                    if extra_module.strip():
+                        harvest_sources.setdefault(extra_module.strip(), "extra-modules")
+
+            packages_to_harvest = set(harvest_sources)
 
             packages_to_harvest_list = [
-                package_name for _, package_name, _ in console_scripts
+                package_name for _, package_name, _ in sorted(console_scripts)
             ]
-            packages_to_harvest_list.extend(list(packages_to_harvest))
-
-            for package_name in packages_to_harvest_list:
-                _package_ = ""
-                try:
-                    _package_ = importlib.import_module(package_name)
-                except:
-                    log.error(f"It was not possible to import: {package_name}")
-                    continue
-
-                PACKAGE__ROOT = os.path.join(os.path.dirname(_package_.__file__))
-                for root, dirs, files in os.walk(PACKAGE__ROOT):
-                    for _file_ in files:
-                        if _file_.endswith(".pyc"):
-                            continue
-                        _module_base_ = _file_.split(".", 1)[0]
-                        src = os.path.join(PACKAGE__ROOT, root, _module_base_)
-                        _python_module_path_segments_ = os.path.join(
-                            _package_.__name__, src[len(PACKAGE__ROOT) + 1 :]
-                        ).split(os.sep)
-                        if _python_module_path_segments_[-1] == "__init__":
-                            _python_module_ = ".".join(
-                                _python_module_path_segments_[:-1]
-                            )
-                        else:
-                            _python_module_ = ".".join(_python_module_path_segments_)
-
-                        if _file_.endswith(".py"):
-                            hidden_imports.add(_python_module_)
-
-                        src = os.path.join(PACKAGE__ROOT, root, _file_)
-                        dst = os.path.join(
-                            "." + os.path.sep,
-                            _package_.__name__,
-                            src[len(PACKAGE__ROOT) + 1 :],
+            packages_to_harvest_list.extend(sorted(packages_to_harvest))
+
+            harvested_imports, harvested_data, failed = scan_packages(
+                packages_to_harvest_list, jobs=self.harvest_jobs
+            )
+            for package_name in failed:
+                log.error(f"It was not possible to import: {package_name}")
+            hidden_imports.update(harvested_imports)
+            extra_data.update(harvested_data)
+
+            if self.data_archive:
+                # Note: python sources and native libraries stay on disk, everything else is
+                #   served from the archive
+                archived_data = set(
+                    item
+                    for item in extra_data
+                    if not item[0].endswith(".py") and not NATIVE_FILE_REGEX.match(item[0])
+                )
+            else:
+                archived_data = set()
+            if archived_data:
+                extra_data.difference_update(archived_data)
+                write_archive(RESOURCE_ARCHIVE_NAME, archived_data)
+                extra_data.add((os.path.abspath(RESOURCE_ARCHIVE_NAME), "."))
+                with open(RESOURCE_ARCHIVE_HOOK, "w") as resource_archive_hook_fl:
+                    resource_archive_hook_fl.write(
+                        """
+import os
+import sys
+from bdist_pyinstaller.resources import install
+
+install(os.path.join(sys._MEIPASS, "{resource_archive}"))
+""".format(
+                            resource_archive=RESOURCE_ARCHIVE_NAME
                         )
-                        extra_data.add((src, os.path.dirname(dst)))
+                    )
+                runtime_hooks.add(os.path.abspath(RESOURCE_ARCHIVE_HOOK))
+
+            bundle_sources = {
+                package_name.split(".", 1)[0]: source
+                for package_name, source in harvest_sources.items()
+            }
+            # Note: the shell pulls more than its harvested packages into the bundle
+            for module_name in shell_modules:
+                bundle_sources.setdefault(module_name, self.shell)
+            with open(HARVEST_MANIFEST_NAME, "w") as harvest_manifest_fl:
+                json.dump(
+                    bundle_sources,
+                    harvest_manifest_fl,
+                    indent=2,
+                    sort_keys=True,
+                )
+            extra_data.add((os.path.abspath(HARVEST_MANIFEST_NAME), "."))
 
             add_extras_cmd = []
             [
                 add_extras_cmd.extend(
                     ["--add-binary", "".join((item[0], os.path.pathsep, item[1]))]
                 )
-                for item in extra_binaries
+                for item in sorted(extra_binaries)
             ]
             [
                 add_extras_cmd.extend(
                     ["--add-data", "".join((item[0], os.path.pathsep, item[1]))]
                 )
-                for item in extra_data
+                for item in sorted(extra_data)
             ]
             [
                 add_extras_cmd.extend(["--hidden-import", "{}".format(item)])
-                for item in hidden_imports
+                for item in sorted(hidden_imports)
+            ]
+            [
+                add_extras_cmd.extend(["--runtime-hook", "{}".format(item)])
+                for item in sorted(runtime_hooks)
             ]
 
             pyinstaller_dist = self.dist_dir or os.path.join(
@@ -471,7 +750,27 @@ if __name__ == "__main__":
 
             sys.argc = len(sys.argv)
             pyinstaller_run()
-            if self.one_dir:
+            if self.one_dir and self.reproducible:
+                # Note: the gzip header carries the timestamp and the name of the file, and the
+                #   default tar format depends on the version of python
+                with open(
+                    os.path.join(pyinstaller_dist, "{}.tar.gz".format(target_name)),
+                    "wb",
+                ) as archive_fl, gzip.GzipFile(
+                    filename="",
+                    mode="wb",
+                    fileobj=archive_fl,
+                    mtime=self.source_date_epoch,
+                ) as gzip_fl, tarfile.open(
+                    fileobj=gzip_fl, mode="w", format=tarfile.GNU_FORMAT
+                ) as archive:
+                    archive.add(
+                        name=os.path.join(pyinstaller_dist, target_name),
+                        arcname=target_name,
+                        recursive=True,
+                        filter=self._normalize_tarinfo,
+                    )
+            elif self.one_dir:
                 with tarfile.open(
                     os.path.join(pyinstaller_dist, "{}.tar.gz".format(target_name)),
                     mode="w:gz",
@@ -490,6 +789,19 @@ if __name__ == "__main__":
         finally:
             sys.argv = _argv_
 
+    def _normalize_tarinfo(self, tarinfo):
+        """
+        Strips the build specific metadata(timestamps, ownership, umask) from the tar entry.
+        """
+        tarinfo.mtime = self.source_date_epoch
+        tarinfo.uid = tarinfo.gid = 0
+        tarinfo.uname = tarinfo.gname = "root"
+        if tarinfo.isdir() or tarinfo.mode & 0o111:
+            tarinfo.mode = 0o755
+        else:
+            tarinfo.mode = 0o644
+        return tarinfo
+
     def create_rpm(self, dist_location, dist_name):
         # Make all necessary directories
         rpm_base = os.path.join(dist_location, "rpm")
@@ -513,6 +825,17 @@ if __name__ == "__main__":
         rpm_cmd.append("-bb")
         rpm_cmd.extend(["--define", "_topdir %s" % os.path.abspath(rpm_base)])
         rpm_cmd.append("--clean")
+        if self.reproducible:
+            rpm_cmd.extend(
+                [
+                    "--define",
+                    "use_source_date_epoch_as_buildtime 1",
+                    "--define",
+                    "clamp_mtime_to_source_date_epoch 1",
+                    "--define",
+                    "_buildhost reproducible",
+                ]
+            )
 
         rpm_cmd.append(spec_path)
 
@@ -568,12 +891,20 @@ if __name__ == "__main__":
         spec_path = os.path.join(deb_base, "DEBIAN", "control")
         self.mkpath(binaries_target_path)
         self.mkpath(os.path.dirname(spec_path))
+        src = os.path.join(dist_location, dist_name)
+        staged_src = None
         for alias in self.aliases:
             dst = os.path.join(binaries_target_path, alias)
-            src = os.path.join(dist_location, dist_name)
             if os.path.exists(dst):
                 os.unlink(dst)
-            os.link(src, dst)
+            if self.reproducible and staged_src is None:
+                # Note: the timestamps of the staged files are reset below, a hard link to the
+                #   binary in the dist location would reset its ones as well. It is copied once,
+                #   the other aliases are linked to the copy.
+                self.copy_file(src, dst, preserve_times=0)
+                staged_src = dst
+            else:
+                os.link(staged_src or src, dst)
 
         arch_string = self._get_deb_build_arch()
         self.execute(
@@ -585,23 +916,44 @@ if __name__ == "__main__":
             f"writing '{spec_path}'",
         )
 
-        os.chmod(deb_base, mode=0o755)
-        os.chmod(os.path.dirname(spec_path), mode=0o755)
+        # Note: mkpath creates the directories according to the umask
+        for _dir_ in (
+            deb_base,
+            os.path.join(deb_base, "usr"),
+            binaries_target_path,
+            os.path.dirname(spec_path),
+        ):
+            os.chmod(_dir_, mode=0o755)
+        if self.reproducible:
+            os.chmod(spec_path, mode=0o644)
+            for alias in self.aliases:
+                os.chmod(os.path.join(binaries_target_path, alias), mode=0o755)
+            for root, dirs, files in os.walk(deb_base):
+                for _file_ in chain(dirs, files):
+                    os.utime(
+                        os.path.join(root, _file_),
+                        (self.source_date_epoch, self.source_date_epoch),
+                    )
 
         # build package
         log.info("building DEBs")
         release = "1"
+        # Note: the package is written out of the tree being packed, dpkg-deb would pick up the
+        #   partially written file otherwise
         deb_filename = os.path.join(
-            deb_base,
+            dist_location,
             f"{self.distribution.get_name()}_{self.distribution.get_version()}_{release}_{arch_string}.deb",
         )
         deb_cmd = ["dpkg-deb", "--build", deb_base, deb_filename]
+        if self.reproducible:
+            deb_cmd.insert(1, "--root-owner-group")
 
         self.spawn(deb_cmd)
         if not self.dry_run:
             pyversion = "any"
             if os.path.exists(deb_filename):
-                self.move_file(deb_filename, self.dist_dir)
+                if os.path.abspath(dist_location) != os.path.abspath(self.dist_dir):
+                    self.move_file(deb_filename, self.dist_dir)
                 filename = os.path.join(self.dist_dir, os.path.basename(deb_filename))
                 self.distribution.dist_files.append(
                     ("bdist_pyinstaller", pyversion, filename)
@@ -729,7 +1081,12 @@ if __name__ == "__main__":
                 "%files",
             ]
         )
+        if self.reproducible:
+            # Note: %defattr only applies to the entries following it, the explicit modes do not
+            #   depend on the umask of the build
+            spec_file.append("%defattr(0755,root,root,0755)")
         spec_file.extend(["/usr/bin/{}".format(alias) for alias in self.aliases])
 
-        spec_file.append("%defattr(-,root,root)")
+        if not self.reproducible:
+            spec_file.append("%defattr(-,root,root)")
         return spec_file
@@ -0,0 +1,383 @@
+# coding: utf-8
+# Copyright 2021 Amadeus IT Group
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+import os
+import json
+import marshal
+import struct
+import zlib
+from collections import Counter
+from distutils.core import Command
+from distutils.errors import *
+from distutils import log
+
+from bdist_pyinstaller.bdist_pyinstaller import HARVEST_MANIFEST_NAME, NATIVE_FILE_REGEX
+
+# Note: the layouts below mirror PyInstaller.archive.readers, they are re-implemented here
+#   so that only the table of contents is read and nothing has to be extracted
+CARCHIVE_MAGIC = b"MEI\014\013\012\013\016"
+CARCHIVE_COOKIE_FORMAT = "!8sIIII64s"
+CARCHIVE_COOKIE_LENGTH = struct.calcsize(CARCHIVE_COOKIE_FORMAT)
+CARCHIVE_TOC_ENTRY_FORMAT = "!IIIIBc"
+CARCHIVE_TOC_ENTRY_LENGTH = struct.calcsize(CARCHIVE_TOC_ENTRY_FORMAT)
+PYZ_MAGIC = b"PYZ\0"
+PYZ_HEADER_FORMAT = "!4s4si"
+PYZ_HEADER_LENGTH = struct.calcsize(PYZ_HEADER_FORMAT)
+
+SEARCH_CHUNK_SIZE = 8192
+
+# CArchive typecode -> file type reported by the analyzer
+CARCHIVE_FILE_TYPES = {
+    "b": "native",
+    "x": "data",
+    "z": "pyz",
+    "Z": "bytecode",
+    "m": "bytecode",
+    "M": "bytecode",
+    "s": "bytecode",
+}
+
+ROOT_PACKAGE = "(root)"
+OVERHEAD_PACKAGE = "(pyinstaller)"
+# Note: the stdlib modules pyinstaller needs to bootstrap, bundled the same way in both modes
+BASE_LIBRARY_NAME = "base_library.zip"
+OVERHEAD_SOURCE = "pyinstaller"
+ANALYSIS_SOURCE = "analysis"
+
+DIMENSIONS = (
+    ("package", "top-level package"),
+    ("file_type", "file type"),
+    ("source", "harvest source"),
+)
+
+
+def top_level_package(name):
+    """
+    Maps the module name or the archive path onto the top-level package it belongs to.
+    """
+    name = name.replace("\\", "/")
+    if name.startswith("_internal/"):
+        name = name[len("_internal/") :]
+    if name == BASE_LIBRARY_NAME:
+        return OVERHEAD_PACKAGE
+    if "/" in name:
+        return name.split("/", 1)[0]
+    if NATIVE_FILE_REGEX.match(name) or name.startswith("."):
+        return ROOT_PACKAGE
+    return name
+
+
+def format_size(size, signed=False):
+    """
+    Formats the number of bytes in a human readable way.
+    """
+    sign = ""
+    if signed:
+        sign = "+" if size >= 0 else "-"
+    value = float(abs(size))
+    for unit in ("B", "KiB", "MiB"):
+        if value < 1024.0:
+            break
+        value /= 1024.0
+    else:
+        unit = "GiB"
+    if unit == "B":
+        return "{}{} {}".format(sign, int(value), unit)
+    return "{}{:.1f} {}".format(sign, value, unit)
+
+
+class BundleReport(object):
+    """
+    Size breakdown of a single onefile or onedir bundle.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self.manifest = {}
+
+    def add(self, package, file_type, size):
+        self.entries.append((package, file_type, size))
+
+    @property
+    def total(self):
+        return sum(size for _, _, size in self.entries)
+
+    def breakdown(self, dimension):
+        """
+        Aggregates the sizes by one of the DIMENSIONS.
+        """
+        counter = Counter()
+        for package, file_type, size in self.entries:
+            if dimension == "package":
+                key = package
+            elif dimension == "file_type":
+                key = file_type
+            elif package == OVERHEAD_PACKAGE:
+                key = OVERHEAD_SOURCE
+            else:
+                key = self.manifest.get(package, ANALYSIS_SOURCE)
+            counter[key] += size
+        return counter
+
+
+def _find_carchive_cookie(fp, end_pos):
+    # Note: the archive is either appended to the bootloader or embedded in one of its
+    #   sections, hence it is looked up from the back of the file
+    magic_offset = -1
+    while end_pos >= len(CARCHIVE_MAGIC):
+        start_pos = max(end_pos - SEARCH_CHUNK_SIZE, 0)
+        fp.seek(start_pos, os.SEEK_SET)
+        pos = fp.read(end_pos - start_pos).rfind(CARCHIVE_MAGIC)
+        if pos != -1:
+            magic_offset = start_pos + pos
+            break
+        if start_pos == 0:
+            break
+        end_pos = start_pos + len(CARCHIVE_MAGIC) - 1
+    return magic_offset
+
+
+def _scan_pyz(fp, pyz_offset, pyz_length, report):
+    fp.seek(pyz_offset, os.SEEK_SET)
+    magic, _, toc_offset = struct.unpack(PYZ_HEADER_FORMAT, fp.read(PYZ_HEADER_LENGTH))
+    if magic != PYZ_MAGIC:
+        raise DistutilsFileError("Invalid PYZ archive at offset {}".format(pyz_offset))
+    fp.seek(pyz_offset + toc_offset, os.SEEK_SET)
+    try:
+        toc = marshal.loads(fp.read(pyz_length - toc_offset))
+    except (EOFError, ValueError, TypeError):
+        # Note: the PYZ was written by a different python version, it is accounted as a whole
+        log.warn("Unable to read the PYZ table of contents, it is reported as a single entry")
+        report.add(OVERHEAD_PACKAGE, "pyz", pyz_length)
+        return
+    if isinstance(toc, dict):
+        toc = toc.items()
+    accounted = 0
+    for name, (_, _, length) in toc:
+        report.add(name.split(".", 1)[0], "pyz", length)
+        accounted += length
+    report.add(OVERHEAD_PACKAGE, "pyz", pyz_length - accounted)
+
+
+def _scan_carchive(fp, file_size, report):
+    """
+    Reads the table of contents of the CArchive embedded in the executable and tallies its entries.
+    Returns False if the file does not contain any.
+    """
+    cookie_offset = _find_carchive_cookie(fp, file_size)
+    if cookie_offset == -1:
+        return False
+
+    fp.seek(cookie_offset, os.SEEK_SET)
+    _, archive_length, toc_offset, toc_length, _, _ = struct.unpack(
+        CARCHIVE_COOKIE_FORMAT, fp.read(CARCHIVE_COOKIE_LENGTH)
+    )
+    archive_start = cookie_offset + CARCHIVE_COOKIE_LENGTH - archive_length
+    fp.seek(archive_start + toc_offset, os.SEEK_SET)
+    toc_data = fp.read(toc_length)
+
+    accounted = 0
+    cur_pos = 0
+    while cur_pos < len(toc_data):
+        (
+            entry_length,
+            entry_offset,
+            data_length,
+            _,
+            compression_flag,
+            typecode,
+        ) = struct.unpack(
+            CARCHIVE_TOC_ENTRY_FORMAT,
+            toc_data[cur_pos : cur_pos + CARCHIVE_TOC_ENTRY_LENGTH],
+        )
+        name = (
+            toc_data[cur_pos + CARCHIVE_TOC_ENTRY_LENGTH : cur_pos + entry_length]
+            .rstrip(b"\0")
+            .decode("utf-8")
+        )
+        cur_pos += entry_length
+        typecode = typecode.decode("ascii")
+
+        if typecode == "z":
+            _scan_pyz(fp, archive_start + entry_offset, data_length, report)
+        elif typecode in CARCHIVE_FILE_TYPES:
+            file_type = CARCHIVE_FILE_TYPES[typecode]
+            if file_type == "data" and NATIVE_FILE_REGEX.match(name):
+                file_type = "native"
+            elif os.path.basename(name) == BASE_LIBRARY_NAME:
+                file_type = "bytecode"
+            if typecode == "s":
+                package = ROOT_PACKAGE
+            else:
+                package = top_level_package(name)
+            report.add(package, file_type, data_length)
+        else:
+            continue
+        accounted += data_length
+
+        if typecode == "x" and os.path.basename(name) == HARVEST_MANIFEST_NAME:
+            fp.seek(archive_start + entry_offset, os.SEEK_SET)
+            data = fp.read(data_length)
+            if compression_flag:
+                data = zlib.decompress(data)
+            report.manifest.update(json.loads(data.decode("utf-8")))
+
+    # Note: bootloader, table of contents, options etc.
+    report.add(OVERHEAD_PACKAGE, "bootloader", file_size - accounted)
+    return True
+
+
+def _scan_file(path, rel_path, report):
+    file_size = os.path.getsize(path)
+    if os.access(path, os.X_OK) and not NATIVE_FILE_REGEX.match(rel_path):
+        with open(path, "rb") as fp:
+            if _scan_carchive(fp, file_size, report):
+                return
+
+    if NATIVE_FILE_REGEX.match(rel_path):
+        file_type = "native"
+    elif rel_path.endswith(".pyc") or os.path.basename(rel_path) == BASE_LIBRARY_NAME:
+        file_type = "bytecode"
+    else:
+        file_type = "data"
+    report.add(top_level_package(rel_path), file_type, file_size)
+
+    if os.path.basename(rel_path) == HARVEST_MANIFEST_NAME:
+        with open(path) as manifest_fl:
+            report.manifest.update(json.load(manifest_fl))
+
+
+def scan_bundle(path):
+    """
+    Produces a BundleReport for the onefile binary or the onedir directory without extracting it.
+    """
+    if not os.path.exists(path):
+        raise DistutilsFileError("The bundle does not exist: {}".format(path))
+
+    report = BundleReport(path)
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for _file_ in sorted(files):
+                src = os.path.join(root, _file_)
+                if os.path.islink(src):
+                    continue
+                _scan_file(src, os.path.relpath(src, path), report)
+    else:
+        with open(path, "rb") as fp:
+            if not _scan_carchive(fp, os.path.getsize(path), report):
+                raise DistutilsFileError(
+                    "The file does not look like a pyinstaller bundle: {}".format(path)
+                )
+    return report
+
+
+def diff_reports(baseline, report, dimension):
+    """
+    Returns the list of (key, baseline size, size, delta) sorted by the growth.
+    """
+    baseline_breakdown = baseline.breakdown(dimension)
+    breakdown = report.breakdown(dimension)
+    rows = [
+        (
+            key,
+            baseline_breakdown.get(key, 0),
+            breakdown.get(key, 0),
+            breakdown.get(key, 0) - baseline_breakdown.get(key, 0),
+        )
+        for key in set(baseline_breakdown) | set(breakdown)
+    ]
+    return sorted(
+        [row for row in rows if row[3]], key=lambda row: (-row[3], row[0])
+    )
+
+
+class PyInstallerAnalyzeCmd(Command):
+    """
+    Breaks down the size of a bundle produced by bdist_pyinstaller and compares it with
+    another one.
+    """
+
+    description = "analyze the size of a pyinstaller bundle and compare it with another one"
+    user_options = [
+        (
+            "artifact=",
+            "a",
+            "onefile binary or onedir directory to analyze",
+            "(default: the bundle of the current distribution)",
+        ),
+        (
+            "compare-to=",
+            "c",
+            "baseline onefile binary or onedir directory to diff against",
+            "(default: None)",
+        ),
+        ("top=", "t", "number of rows per breakdown", "(default: 20)"),
+    ]
+
+    def initialize_options(self):
+        self.artifact = None
+        self.compare_to = None
+        self.top = None
+
+    def finalize_options(self):
+        if self.artifact is None:
+            bdist_pyinstaller = self.get_finalized_command("bdist_pyinstaller")
+            self.artifact = os.path.join(
+                bdist_pyinstaller.dist_dir,
+                "{}-{}".format(
+                    self.distribution.get_name(), self.distribution.get_version()
+                ),
+            )
+        self.top = int(self.top or 20)
+
+    def run(self):
+        report = scan_bundle(self.artifact)
+        log.info("%s: %s", report.path, format_size(report.total))
+        for dimension, title in DIMENSIONS:
+            log.info("")
+            log.info("by %s:", title)
+            for key, size in report.breakdown(dimension).most_common(self.top):
+                log.info(
+                    "  %12s  %5.1f%%  %s",
+                    format_size(size),
+                    100.0 * size / (report.total or 1),
+                    key,
+                )
+
+        if not self.compare_to:
+            return
+
+        baseline = scan_bundle(self.compare_to)
+        log.info("")
+        log.info(
+            "%s -> %s: %s",
+            baseline.path,
+            report.path,
+            format_size(report.total - baseline.total, signed=True),
+        )
+        for dimension, title in DIMENSIONS:
+            log.info("")
+            log.info("growth by %s:", title)
+            for key, baseline_size, size, delta in diff_reports(baseline, report, dimension)[
+                : self.top
+            ]:
+                log.info(
+                    "  %12s  %12s -> %-12s %s",
+                    format_size(delta, signed=True),
+                    format_size(baseline_size),
+                    format_size(size),
+                    key,
+                )
@@ -0,0 +1,166 @@
+# coding: utf-8
+# Copyright 2021 Amadeus IT Group
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""
+Scanning of the packages to harvest for hidden imports and data files.
+
+The scan runs in worker subprocesses(python -m bdist_pyinstaller.harvest <package>...), so that
+neither the import side effects nor the memory used by the scanned packages leak into the process
+running pyinstaller afterwards.
+"""
+import sys
+import os
+import json
+import subprocess
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+
+def locate_package(package_name):
+    """
+    Returns the (module name, directory) of the package without executing it where possible.
+    """
+    spec = None
+    try:
+        spec = importlib.util.find_spec(package_name)
+    except (ImportError, ValueError, AttributeError):
+        pass
+
+    if spec is not None:
+        if spec.has_location and spec.origin and os.path.isfile(spec.origin):
+            return spec.name, os.path.dirname(spec.origin)
+        if spec.submodule_search_locations:
+            # Note: PEP-420 namespace package
+            return spec.name, list(spec.submodule_search_locations)[0]
+
+    # Note: the last resort, custom importers may only expose the location once imported
+    _package_ = importlib.import_module(package_name)
+    return _package_.__name__, os.path.dirname(_package_.__file__)
+
+
+def scan_package(package_name):
+    """
+    Walks the directory of the package and returns the hidden imports and the data files found
+    in it.
+    """
+    module_name, PACKAGE__ROOT = locate_package(package_name)
+    hidden_imports = []
+    extra_data = []
+    for root, dirs, files in os.walk(PACKAGE__ROOT):
+        for _file_ in files:
+            if _file_.endswith(".pyc"):
+                continue
+            _module_base_ = _file_.split(".", 1)[0]
+            src = os.path.join(PACKAGE__ROOT, root, _module_base_)
+            _python_module_path_segments_ = os.path.join(
+                module_name, src[len(PACKAGE__ROOT) + 1 :]
+            ).split(os.sep)
+            if _python_module_path_segments_[-1] == "__init__":
+                _python_module_ = ".".join(_python_module_path_segments_[:-1])
+            else:
+                _python_module_ = ".".join(_python_module_path_segments_)
+
+            if _file_.endswith(".py"):
+                hidden_imports.append(_python_module_)
+
+            src = os.path.join(PACKAGE__ROOT, root, _file_)
+            dst = os.path.join(
+                "." + os.path.sep,
+                module_name,
+                src[len(PACKAGE__ROOT) + 1 :],
+            )
+            extra_data.append((src, os.path.dirname(dst)))
+    return hidden_imports, extra_data
+
+
+def scan_packages(package_names, jobs=None):
+    """
+    Scans the packages in a pool of worker subprocesses and merges the results.
+    Returns the (hidden imports, extra data, packages which could not be located).
+    """
+    package_names = list(dict.fromkeys(package_names))
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(package_names)))
+    chunks = [package_names[i::jobs] for i in range(jobs)]
+
+    # Note: the workers have to see the very same packages as the build process
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+
+    def run_worker(chunk):
+        result = {"hidden_imports": [], "extra_data": [], "failed": []}
+        while chunk:
+            completed_process = subprocess.run(
+                [sys.executable, "-m", __name__] + chunk,
+                stdout=subprocess.PIPE,
+                env=env,
+            )
+            reported = set()
+            for line in completed_process.stdout.decode(errors="replace").splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or record.get("package") not in chunk:
+                    continue
+                reported.add(record["package"])
+                if record.get("failed"):
+                    result["failed"].append(record["package"])
+                else:
+                    result["hidden_imports"].extend(record["hidden_imports"])
+                    result["extra_data"].extend(record["extra_data"])
+            unreported = [package_name for package_name in chunk if package_name not in reported]
+            if unreported:
+                # Note: the worker crashed(os._exit, a signal ...) on the first package it did not
+                #   report, the ones after it are scanned again by a new worker
+                result["failed"].append(unreported[0])
+            chunk = unreported[1:]
+        return result
+
+    hidden_imports = set()
+    extra_data = set()
+    failed = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for result in executor.map(run_worker, chunks):
+            hidden_imports.update(result["hidden_imports"])
+            extra_data.update(tuple(item) for item in result["extra_data"])
+            failed.extend(result["failed"])
+    return hidden_imports, extra_data, sorted(failed)
+
+
+def main(package_names):
+    # Note: the result is written to the original stdout, fd 1 is pointed at stderr so that
+    #   whatever the scanned packages print(even below the python level) does not garble it
+    result_fl = os.fdopen(os.dup(1), "w")
+    sys.stdout.flush()
+    os.dup2(2, 1)
+    for package_name in package_names:
+        try:
+            hidden_imports, extra_data = scan_package(package_name)
+            record = {
+                "package": package_name,
+                "hidden_imports": hidden_imports,
+                "extra_data": extra_data,
+            }
+        except BaseException:
+            # Note: that includes sys.exit() called by the package when it is imported
+            record = {"package": package_name, "failed": True}
+        # Note: one line per package, so that a crash only loses the package being scanned
+        result_fl.write(json.dumps(record) + "\n")
+        result_fl.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
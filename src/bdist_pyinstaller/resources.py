@@ -0,0 +1,335 @@
+# coding: utf-8
+# Copyright 2021 Amadeus IT Group
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+"""
+Single-file archive for the package data files harvested by bdist_pyinstaller.
+
+At build time write_archive() packs the data files into one indexed file which is bundled in
+instead of thousands of loose --add-data entries. At run time install() (called from a pyinstaller
+runtime hook) memory-maps it and plugs an importlib.resources compatible reader into the packages,
+serving the files as slices of the mapping. The APIs which require a real filesystem path get the
+file extracted on demand.
+
+The module is bundled into the binaries, so it must only depend on the standard library.
+"""
+import sys
+import os
+import io
+import json
+import mmap
+import struct
+import atexit
+import shutil
+import tempfile
+
+ARCHIVE_MAGIC = b"BPRA\x01\0\0\0"
+ARCHIVE_HEADER_FORMAT = "!8sQQ"
+ARCHIVE_HEADER_LENGTH = struct.calcsize(ARCHIVE_HEADER_FORMAT)
+
+
+def write_archive(path, entries):
+    """
+    Packs the (source file, destination directory) entries into the archive.
+    The destination directories are the ones which would be passed to pyinstaller's --add-data.
+    """
+    members = {}
+    for src, dst in entries:
+        name = os.path.normpath(os.path.join(dst, os.path.basename(src)))
+        members[name.replace(os.sep, "/")] = src
+
+    index = {}
+    with open(path, "wb") as archive_fl:
+        archive_fl.write(b"\0" * ARCHIVE_HEADER_LENGTH)
+        for name in sorted(members):
+            with open(members[name], "rb") as member_fl:
+                offset = archive_fl.tell()
+                shutil.copyfileobj(member_fl, archive_fl)
+                index[name] = [offset, archive_fl.tell() - offset]
+        index_offset = archive_fl.tell()
+        index_data = json.dumps(index, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        archive_fl.write(index_data)
+        archive_fl.seek(0, os.SEEK_SET)
+        archive_fl.write(
+            struct.pack(ARCHIVE_HEADER_FORMAT, ARCHIVE_MAGIC, index_offset, len(index_data))
+        )
+    return sorted(members)
+
+
+class ResourceArchive(object):
+    """
+    Read-only, memory-mapped view of the archive written by write_archive().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as archive_fl:
+            # Note: the mapping outlives the file descriptor and it is never closed as the slices
+            #   handed out by the readers may still be referenced
+            self._mmap = mmap.mmap(archive_fl.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, index_offset, index_length = struct.unpack(
+            ARCHIVE_HEADER_FORMAT, self._mmap[:ARCHIVE_HEADER_LENGTH]
+        )
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError("Not a resource archive: {}".format(path))
+        self.files = json.loads(
+            self._mmap[index_offset : index_offset + index_length].decode("utf-8")
+        )
+        self.dirs = {}
+        for name in self.files:
+            parent, _, child = name.rpartition("/")
+            while True:
+                self.dirs.setdefault(parent, set()).add(child)
+                if not parent:
+                    break
+                parent, _, child = parent.rpartition("/")
+        self.top_levels = self.dirs.get("", set())
+        self._extracted_dir = None
+
+    def view(self, name):
+        """
+        Returns the zero-copy memoryview of the member.
+        """
+        offset, size = self.files[name]
+        return self._view[offset : offset + size]
+
+    def extract(self, name):
+        """
+        Extracts the member(once per process) for the APIs which require a real filesystem path.
+        """
+        if self._extracted_dir is None:
+            self._extracted_dir = tempfile.mkdtemp(prefix="_bpra")
+            atexit.register(shutil.rmtree, self._extracted_dir, True)
+        path = os.path.join(self._extracted_dir, *name.split("/"))
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = "{}.{}".format(path, os.getpid())
+            with open(tmp_path, "wb") as member_fl:
+                member_fl.write(self.view(name))
+            os.replace(tmp_path, path)
+        return path
+
+
+class ArchiveMemberIO(io.RawIOBase):
+    """
+    Binary file object reading straight from the memory mapping.
+    """
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), len(self._view) - self._pos)
+        buffer[:size] = self._view[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def readall(self):
+        data = bytes(self._view[self._pos :])
+        self._pos = len(self._view)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class ArchiveTraversable(object):
+    """
+    importlib.resources Traversable of a file or a directory in the archive.
+    The names missing in the archive are looked up in the fallback location(the files pyinstaller
+    put on disk).
+    """
+
+    def __init__(self, archive, name, fallback=None):
+        self._archive = archive
+        self._name = name
+        self._fallback = fallback
+
+    def __repr__(self):
+        return "{}({!r}, {!r})".format(self.__class__.__name__, self._archive.path, self._name)
+
+    @property
+    def name(self):
+        return self._name.rpartition("/")[2]
+
+    def _in_archive(self):
+        return self._name in self._archive.files or self._name in self._archive.dirs
+
+    def is_file(self):
+        if self._name in self._archive.files:
+            return True
+        return bool(self._fallback is not None and self._fallback.is_file())
+
+    def is_dir(self):
+        if self._name in self._archive.dirs:
+            return True
+        return bool(self._fallback is not None and self._fallback.is_dir())
+
+    def iterdir(self):
+        children = set(self._archive.dirs.get(self._name, ()))
+        if self._fallback is not None and self._fallback.is_dir():
+            children.update(child.name for child in self._fallback.iterdir())
+        return iter([self.joinpath(child) for child in sorted(children)])
+
+    def joinpath(self, *descendants):
+        name = self._name
+        fallback = self._fallback
+        for descendant in descendants:
+            for segment in str(descendant).replace("\\", "/").split("/"):
+                if segment in ("", "."):
+                    continue
+                name = "/".join((name, segment)) if name else segment
+                if fallback is not None:
+                    fallback = fallback.joinpath(segment)
+        return ArchiveTraversable(self._archive, name, fallback)
+
+    __truediv__ = joinpath
+
+    def open(self, mode="r", *args, **kwargs):
+        if self._name not in self._archive.files:
+            if self._fallback is None:
+                raise FileNotFoundError(self._name)
+            return self._fallback.open(mode, *args, **kwargs)
+        if "w" in mode or "a" in mode or "+" in mode:
+            raise PermissionError("The resource archive is read-only: {}".format(self._name))
+        stream = ArchiveMemberIO(self._archive.view(self._name))
+        if "b" in mode:
+            return stream
+        return io.TextIOWrapper(io.BufferedReader(stream), *args, **kwargs)
+
+    def read_bytes(self):
+        if self._name not in self._archive.files:
+            return self.open("rb").read()
+        return bytes(self._archive.view(self._name))
+
+    def read_text(self, encoding=None):
+        return self.read_bytes().decode(encoding or "utf-8")
+
+    def __fspath__(self):
+        # Note: extract-on-demand for the APIs which require a real path
+        if self._name in self._archive.files:
+            return self._archive.extract(self._name)
+        if self._fallback is not None:
+            return os.fspath(self._fallback)
+        raise FileNotFoundError(self._name)
+
+
+class ArchiveResourceReader(object):
+    """
+    importlib.resources reader of a package whose data files were packed into the archive.
+    """
+
+    def __init__(self, archive, package_dir, fallback_reader=None):
+        fallback = None
+        if fallback_reader is not None and hasattr(fallback_reader, "files"):
+            fallback = fallback_reader.files()
+        self._files = ArchiveTraversable(archive, package_dir, fallback)
+
+    def files(self):
+        return self._files
+
+    def open_resource(self, resource):
+        return self._files.joinpath(resource).open("rb")
+
+    def resource_path(self, resource):
+        return os.fspath(self._files.joinpath(resource))
+
+    def is_resource(self, resource):
+        return self._files.joinpath(resource).is_file()
+
+    def contents(self):
+        return (item.name for item in self._files.iterdir())
+
+
+class ArchiveLoader(object):
+    """
+    Wraps the loader of the package to substitute its resource reader.
+    """
+
+    def __init__(self, loader, archive, package_dir):
+        self._loader = loader
+        self._archive = archive
+        self._package_dir = package_dir
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        return self._loader.exec_module(module)
+
+    def get_resource_reader(self, fullname):
+        fallback_reader = None
+        if hasattr(self._loader, "get_resource_reader"):
+            fallback_reader = self._loader.get_resource_reader(fullname)
+        return ArchiveResourceReader(self._archive, self._package_dir, fallback_reader)
+
+
+class ArchiveFinder(object):
+    """
+    Meta path finder delegating to the regular ones and wrapping the loaders of the packages with
+    resources in the archive.
+    """
+
+    def __init__(self, archive):
+        self._archive = archive
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split(".", 1)[0] not in self._archive.top_levels:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.submodule_search_locations is not None:
+            package_dir = fullname.replace(".", "/")
+        else:
+            package_dir = fullname.rpartition(".")[0].replace(".", "/")
+        if spec.loader is not None and package_dir in self._archive.dirs:
+            spec.loader = ArchiveLoader(spec.loader, self._archive, package_dir)
+        return spec
+
+    def invalidate_caches(self):
+        pass
+
+
+def install(path):
+    """
+    Serves the package resources from the archive, returns the finder registered in sys.meta_path.
+    """
+    finder = ArchiveFinder(ResourceArchive(path))
+    sys.meta_path.insert(0, finder)
+    return finder
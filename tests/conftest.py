@@ -18,4 +18,23 @@ def pyinstaller_bundles(tmpdir_factory):
                                'bdist_pyinstaller', '-b', str(build_dir), '-d', str(dist_dir)])
 
     os.chdir(pwd)
-    return sorted(str(fname) for fname in dist_dir.listdir())
\ No newline at end of file
+    return sorted(str(fname) for fname in dist_dir.listdir())
+
+@pytest.fixture
+def build_bundle(tmpdir_factory):
+    """Returns a function building a test distribution with the given options."""
+    def build(*options, dist_name="simple", env=None):
+        pwd = os.path.abspath(os.curdir)
+        this_dir = os.path.dirname(__file__)
+        build_dir = tmpdir_factory.mktemp('build')
+        dist_dir = tmpdir_factory.mktemp('dist')
+        os.chdir(os.path.join(this_dir, 'testdata', dist_name))
+        try:
+            subprocess.check_call([sys.executable, 'setup.py',
+                                   'bdist_pyinstaller', '-b', str(build_dir), '-d', str(dist_dir)]
+                                  + [option.format(dist_dir=dist_dir) for option in options],
+                                  env=env)
+        finally:
+            os.chdir(pwd)
+        return dist_dir
+    return build
@@ -1,10 +1,14 @@
+import json
 import os
 import sys
+import shutil
 import subprocess
 from itertools import chain
 
+import pytest
+
 def test_bundles(tmpdir_factory):
-    test_distributions = (("simple", "0.1", ("hello",)),)
+    test_distributions = (("simple", "0.1", ("hello", "hello-data", "hello-mp")),)
     pwd = os.path.abspath(os.curdir)
     this_dir = os.path.dirname(__file__)
     build_dir = tmpdir_factory.mktemp('build')
@@ -26,4 +30,94 @@ def test_bundles(tmpdir_factory):
                       for fname in dist_dir.listdir()) == list(chain(entrypoints, ["{}-{}".format(dist_name, dist_version), "{}-python".format(dist_name)]))
 
         # Execute the first entrypoint
-        subprocess.check_call([os.path.join(dist_dir, entrypoints[0])])
\ No newline at end of file
+        subprocess.check_call([os.path.join(dist_dir, entrypoints[0])])
+
+        # The multiprocessing children are routed by the dispatcher instead of re-running the
+        #   entrypoint
+        output = subprocess.run([os.path.join(dist_dir, "hello-mp")], stdout=subprocess.PIPE,
+                                timeout=120, check=True).stdout
+        assert output.split() == [b"spawn:", b"285", b"forkserver:", b"285"]
+
+def test_bundle_with_console_shell(build_bundle):
+    dist_dir = build_bundle('--shell=console')
+
+    subprocess.check_call([os.path.join(dist_dir, "simple-0.1"), 'setup_aliases'])
+
+    # The stdlib based shell runs the input in the same runtime as the entrypoints
+    output = subprocess.run([os.path.join(dist_dir, "simple-python")],
+                            input=b"import simple.cli\nprint(6 * 7)\n",
+                            stdout=subprocess.PIPE, check=True).stdout
+    assert b"42" in output
+
+
+def test_bundle_with_forkserver_preload(build_bundle):
+    dist_dir = build_bundle('--shell=none', '--forkserver-preload')
+
+    subprocess.check_call([os.path.join(dist_dir, "simple-0.1"), 'setup_aliases'])
+
+    # The forkserver imports the modules of the command before forking the workers
+    output = subprocess.run([os.path.join(dist_dir, "hello-mp")], stdout=subprocess.PIPE,
+                            timeout=120, check=True).stdout
+    assert output.split() == [b"spawn:", b"285", b"forkserver:", b"285"]
+
+
+def test_bundle_metrics(build_bundle):
+    dist_dir = build_bundle('--shell=none', '--metrics-file={dist_dir}/metrics.jsonl')
+    metrics_file = dist_dir.join('metrics.jsonl')
+
+    subprocess.check_call([os.path.join(dist_dir, "simple-0.1"), 'setup_aliases'])
+    subprocess.check_call([os.path.join(dist_dir, "hello")])
+
+    # One record per invocation
+    records = [json.loads(line) for line in metrics_file.readlines()]
+    assert [(r["alias"], r["exit_code"]) for r in records] == [("simple-0.1", 0), ("hello", 0)]
+    assert all(r["wall_seconds"] > 0 and r["max_rss_bytes"] > 0 for r in records)
+    assert all(r["cpu_seconds"] >= 0 for r in records)
+
+
+def test_reproducible_bundles(build_bundle):
+    env = dict(os.environ, SOURCE_DATE_EPOCH="1600000000", PYTHONHASHSEED="0")
+    archives = []
+    for _ in range(2):
+        dist_dir = build_bundle('--shell=none', '--one-dir', '--reproducible', env=env)
+        archives.append(dist_dir.join("simple-0.1.tar.gz").read_binary())
+
+    # Identical inputs give byte-identical outputs
+    assert archives[0] == archives[1]
+
+
+def test_bundle_with_data_archive(build_bundle):
+    dist_dir = build_bundle('--shell=none', '--data-archive')
+
+    subprocess.check_call([os.path.join(dist_dir, "simple-0.1"), 'setup_aliases'])
+
+    # The package data is served from the archive by the runtime hook, extracted for as_file()
+    output = subprocess.run([os.path.join(dist_dir, "hello-data")],
+                            stdout=subprocess.PIPE, check=True).stdout
+    assert output.splitlines() == [b"Hello from the package data"] * 2
+
+
+@pytest.mark.skipif(shutil.which("dpkg-deb") is None, reason="dpkg-deb is not available")
+def test_reproducible_debs(build_bundle):
+    env = dict(os.environ, SOURCE_DATE_EPOCH="1600000000", PYTHONHASHSEED="0")
+    debs = []
+    for _ in range(2):
+        dist_dir = build_bundle('--shell=none', '--deb', '--reproducible', env=env)
+        mtime = dist_dir.join("simple-0.1").mtime()
+        [deb] = dist_dir.listdir("*.deb")
+        debs.append(deb.read_binary())
+        # The staged copies are normalized, not the binary itself
+        assert mtime != 1600000000
+        contents = subprocess.run(["dpkg-deb", "-c", str(deb)], stdout=subprocess.PIPE,
+                                  check=True).stdout.decode().splitlines()
+        # The aliases share a single copy of the binary
+        assert [line.split()[:2] + line.split()[5:] for line in contents] == [
+            ["drwxr-xr-x", "root/root", "./"],
+            ["drwxr-xr-x", "root/root", "./usr/"],
+            ["drwxr-xr-x", "root/root", "./usr/bin/"],
+            ["-rwxr-xr-x", "root/root", "./usr/bin/hello"],
+            ["hrwxr-xr-x", "root/root", "./usr/bin/hello-data", "link", "to", "./usr/bin/hello"],
+            ["hrwxr-xr-x", "root/root", "./usr/bin/hello-mp", "link", "to", "./usr/bin/hello"],
+        ]
+
+    assert debs[0] == debs[1]
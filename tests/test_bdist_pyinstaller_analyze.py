@@ -0,0 +1,107 @@
+import json
+import marshal
+import struct
+import zlib
+
+from bdist_pyinstaller.bdist_pyinstaller import HARVEST_MANIFEST_NAME
+from bdist_pyinstaller.bdist_pyinstaller_analyze import (
+    CARCHIVE_COOKIE_FORMAT,
+    CARCHIVE_MAGIC,
+    CARCHIVE_TOC_ENTRY_FORMAT,
+    CARCHIVE_TOC_ENTRY_LENGTH,
+    PYZ_HEADER_FORMAT,
+    PYZ_MAGIC,
+    diff_reports,
+    scan_bundle,
+)
+
+
+def make_onefile(path, modules, files):
+    """Writes a fake bootloader followed by a CArchive with a PYZ and the given files."""
+    pyz = b""
+    pyz_toc = []
+    offset = struct.calcsize(PYZ_HEADER_FORMAT)
+    for name, size in modules:
+        pyz_toc.append((name, (0, offset, size)))
+        pyz += b"m" * size
+        offset += size
+    pyz_header = struct.pack(PYZ_HEADER_FORMAT, PYZ_MAGIC, b"\0" * 4, offset)
+    pyz = pyz_header + pyz + marshal.dumps(pyz_toc)
+
+    archive = b""
+    toc = b""
+    for name, data, compressed, typecode in [("PYZ.pyz", pyz, 0, b"z")] + files:
+        stored = zlib.compress(data) if compressed else data
+        encoded_name = name.encode("utf-8")
+        encoded_name += b"\0" * (16 - (CARCHIVE_TOC_ENTRY_LENGTH + len(encoded_name)) % 16)
+        toc += struct.pack(
+            CARCHIVE_TOC_ENTRY_FORMAT,
+            CARCHIVE_TOC_ENTRY_LENGTH + len(encoded_name),
+            len(archive),
+            len(stored),
+            len(data),
+            compressed,
+            typecode,
+        ) + encoded_name
+        archive += stored
+    cookie_length = struct.calcsize(CARCHIVE_COOKIE_FORMAT)
+    cookie = struct.pack(
+        CARCHIVE_COOKIE_FORMAT,
+        CARCHIVE_MAGIC,
+        len(archive) + len(toc) + cookie_length,
+        len(archive),
+        len(toc),
+        311,
+        b"libpython3.so",
+    )
+    with open(path, "wb") as fl:
+        fl.write(b"\x7fELF" + b"\0" * 96 + archive + toc + cookie)
+
+
+def test_scan_and_diff(tmpdir):
+    manifest = json.dumps({"simple": "distribution.packages", "parso": "ipython"}).encode()
+    baseline_path = str(tmpdir.join("baseline"))
+    make_onefile(
+        baseline_path,
+        [("simple", 100), ("simple.cli", 50), ("json", 10)],
+        [(HARVEST_MANIFEST_NAME, manifest, 1, b"x")],
+    )
+    bundle_path = str(tmpdir.join("bundle"))
+    make_onefile(
+        bundle_path,
+        [("simple", 100), ("simple.cli", 50), ("json", 10), ("parso", 400)],
+        [
+            (HARVEST_MANIFEST_NAME, manifest, 1, b"x"),
+            ("parso/python/grammar.txt", b"g" * 30, 0, b"x"),
+            ("lib-dynload/_foo.so", b"f" * 70, 0, b"b"),
+            ("base_library.zip", b"s" * 20, 0, b"x"),
+        ],
+    )
+
+    baseline = scan_bundle(baseline_path)
+    report = scan_bundle(bundle_path)
+
+    assert report.total == tmpdir.join("bundle").size()
+    assert report.breakdown("package")["simple"] == 150
+    assert report.breakdown("package")["parso"] == 430
+    assert report.breakdown("file_type")["native"] == 70
+    assert report.breakdown("file_type")["bytecode"] == 20
+    assert "base_library.zip" not in report.breakdown("package")
+    assert report.breakdown("source")["ipython"] == 430
+    assert report.breakdown("source")["distribution.packages"] == 150
+
+    growth = diff_reports(baseline, report, "package")
+    assert growth[0] == ("parso", 0, 430, 430)
+    assert "simple" not in [key for key, _, _, _ in growth]
+
+
+def test_scan_onedir(tmpdir):
+    bundle_dir = tmpdir.mkdir("bundle")
+    internal_dir = bundle_dir.mkdir("_internal")
+    internal_dir.join("base_library.zip").write_binary(b"s" * 20)
+    internal_dir.mkdir("parso").join("grammar.txt").write_binary(b"g" * 30)
+
+    report = scan_bundle(str(bundle_dir))
+
+    # The bootstrap stdlib is classified the same way as in the onefile mode
+    assert sorted(report.entries) == [("(pyinstaller)", "bytecode", 20), ("parso", "data", 30)]
@@ -0,0 +1,48 @@
+import os
+import sys
+
+from bdist_pyinstaller.harvest import scan_packages
+
+
+def test_scan_packages(tmpdir, monkeypatch):
+    package_dir = tmpdir.mkdir("harvested")
+    # Note: the package must not be executed by the scan
+    package_dir.join("__init__.py").write("raise RuntimeError('executed')\n")
+    package_dir.mkdir("sub").join("__init__.py").write("")
+    package_dir.join("sub").join("mod.py").write("")
+    package_dir.join("sub").join("resource.txt").write("resource")
+    monkeypatch.setattr(sys, "path", [str(tmpdir)] + sys.path)
+
+    hidden_imports, extra_data, failed = scan_packages(
+        ["harvested", "not_existing_package", "harvested"], jobs=2
+    )
+
+    assert failed == ["not_existing_package"]
+    assert hidden_imports == {"harvested", "harvested.sub", "harvested.sub.mod"}
+    assert (
+        str(package_dir.join("sub").join("resource.txt")),
+        os.path.join(".", "harvested", "sub"),
+    ) in extra_data
+    assert "harvested" not in sys.modules
+
+
+def test_scan_packages_failures(tmpdir, monkeypatch):
+    # Note: the parent packages of the dotted names are executed by the scan
+    for name, init in (
+        ("noisy", "import os\nos.write(1, b'banner\\n')\n"),
+        ("exiting", "import sys\nsys.exit(0)\n"),
+        ("crashing", "import os\nos._exit(3)\n"),
+    ):
+        package_dir = tmpdir.mkdir(name)
+        package_dir.join("__init__.py").write(init)
+        package_dir.join("sub.py").write("")
+    tmpdir.mkdir("kept").join("__init__.py").write("")
+    monkeypatch.setattr(sys, "path", [str(tmpdir)] + sys.path)
+
+    # Only the offending packages fail, not the others scanned by the same worker
+    hidden_imports, _, failed = scan_packages(
+        ["noisy.sub", "exiting.sub", "crashing.sub", "kept"], jobs=1
+    )
+    assert failed == ["crashing.sub", "exiting.sub"]
+    assert "kept" in hidden_imports
+    assert "noisy.sub" in hidden_imports
@@ -0,0 +1,49 @@
+import os
+import sys
+import importlib.resources
+
+from bdist_pyinstaller.resources import install, write_archive
+
+
+def test_archive_resources(tmpdir, monkeypatch):
+    # Note: the package on disk only holds python sources, the data files live in the archive
+    tmpdir.mkdir("packed").join("__init__.py").write("")
+    resources_dir = tmpdir.mkdir("resources")
+    resources_dir.join("a.txt").write("hello resource")
+    resources_dir.join("b.bin").write_binary(b"\0\1\2")
+    archive_path = str(tmpdir.join("resources.bin"))
+    write_archive(
+        archive_path,
+        [
+            (str(resources_dir.join("a.txt")), os.path.join(".", "packed", "data")),
+            (str(resources_dir.join("b.bin")), os.path.join(".", "packed")),
+        ],
+    )
+
+    monkeypatch.setattr(sys, "path", [str(tmpdir)] + sys.path)
+    monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+    install(archive_path)
+
+    files = importlib.resources.files("packed")
+    assert sorted(item.name for item in files.iterdir()) == ["__init__.py", "b.bin", "data"]
+    assert (files / "data" / "a.txt").read_text() == "hello resource"
+    assert files.joinpath("b.bin").open("rb").read() == b"\0\1\2"
+    assert files.joinpath("__init__.py").is_file()
+
+    # Extract-on-demand for the APIs which require a real path
+    with importlib.resources.as_file(files / "data" / "a.txt") as path:
+        with open(path) as fl:
+            assert fl.read() == "hello resource"
+    with open(os.fspath(files / "b.bin"), "rb") as fl:
+        assert fl.read() == b"\0\1\2"
+
+    sys.modules.pop("packed", None)
+
+
+def test_empty_archive(tmpdir, monkeypatch):
+    archive_path = str(tmpdir.join("resources.bin"))
+    assert write_archive(archive_path, []) == []
+
+    monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+    finder = install(archive_path)
+    assert finder.find_spec("json") is None
@@ -7,8 +7,11 @@ setup(name='simple',
       entry_points={
           'console_scripts': [
               'hello=simple.cli:main',
+              'hello-mp=simple.cli:main_mp',
+              'hello-data=simple.cli:main_data',
           ],
       },
       include_package_data=True,
+      package_data={'simple': ['data/*.txt']},
       zip_safe=False,
       )
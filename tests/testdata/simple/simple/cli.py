@@ -1,2 +1,24 @@
+import importlib.resources
+import multiprocessing
+
+
 def main():
-    print("Here we go! It works")
\ No newline at end of file
+    print("Here we go! It works")
+
+
+def square(x):
+    return x * x
+
+
+def main_mp():
+    for start_method in ("spawn", "forkserver"):
+        with multiprocessing.get_context(start_method).Pool(2) as pool:
+            print("{}: {}".format(start_method, sum(pool.map(square, range(10)))))
+
+
+def main_data():
+    greeting = importlib.resources.files("simple") / "data" / "greeting.txt"
+    print(greeting.read_text().strip())
+    with importlib.resources.as_file(greeting) as path:
+        with open(path) as fl:
+            print(fl.read().strip())